@@ -0,0 +1,54 @@
+"""Compares the ORM + response_model path of the list endpoints with the Core
+fast path from src.fast_path, on an in-memory SQLite copy of the tickets table.
+
+    python -m benchmarks.serialization [rows] [repeat]
+"""
+import json
+import sys
+import timeit
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from src.database import Base
+from src.fast_path import dumps
+from src.routes.Ticket.models import Tickets, ticket_columns
+from src.routes.Ticket.schemas import TicketModel
+
+
+def orm_path(engine) -> bytes:
+    with Session(engine) as session:
+        tickets = session.execute(select(Tickets)).scalars().all()
+        models: List[TicketModel] = [TicketModel.model_validate(ticket, from_attributes=True) for ticket in tickets]
+        return json.dumps(jsonable_encoder(models)).encode()
+
+
+def fast_path(engine) -> bytes:
+    with engine.connect() as connection:
+        rows = connection.execute(select(*ticket_columns)).all()
+        return dumps([row._asdict() for row in rows])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Tickets), [
+            {"email": f"user{i}@example.com", "status": "waiting", "worker_id": i % 10 + 1, "office_id": 1}
+            for i in range(rows)
+        ])
+
+    assert json.loads(orm_path(engine)) == json.loads(fast_path(engine))
+
+    for name, func in (("orm", orm_path), ("fast", fast_path)):
+        seconds = min(timeit.repeat(lambda: func(engine), number=repeat, repeat=5)) / repeat
+        print(f"{name:>5}: {seconds * 1000:8.3f} ms per {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
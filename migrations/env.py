@@ -16,6 +16,7 @@ from src.database import Base
 
 from src.auth.models import User
 from src.routes.Ticket.models import Tickets
+from src.outbox.models import OutboxEvent
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
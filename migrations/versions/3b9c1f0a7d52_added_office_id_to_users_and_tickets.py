@@ -0,0 +1,30 @@
+"""Added office_id to users and tickets
+
+Revision ID: 3b9c1f0a7d52
+Revises: e78a260eb145
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9c1f0a7d52'
+down_revision = 'e78a260eb145'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('office_id', sa.Integer(), server_default='1', nullable=False))
+    op.create_index(op.f('ix_users_office_id'), 'users', ['office_id'], unique=False)
+    op.add_column('tickets', sa.Column('office_id', sa.Integer(), server_default='1', nullable=False))
+    op.create_index(op.f('ix_tickets_office_id'), 'tickets', ['office_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tickets_office_id'), table_name='tickets')
+    op.drop_column('tickets', 'office_id')
+    op.drop_index(op.f('ix_users_office_id'), table_name='users')
+    op.drop_column('users', 'office_id')
@@ -1,10 +1,15 @@
+from typing import Optional
+
 from fastapi_users import FastAPIUsers
 from fastapi_users.authentication import CookieTransport, AuthenticationBackend
 from fastapi_users.authentication import JWTStrategy
 
-from src.auth.manager import get_user_manager
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+
+from src.auth.manager import UserManager, get_user_manager
 from src.auth.models import User
 from src.config import SECRET_AUTH
+from src.database import async_session_maker
 
 cookie_transport = CookieTransport(cookie_name="token", cookie_max_age=3600, cookie_httponly=True, cookie_samesite="none")
 
@@ -24,3 +29,14 @@ fastapi_users = FastAPIUsers[User, int](
 )
 
 current_user = fastapi_users.current_user()
+
+
+async def get_user_by_token(token: Optional[str]) -> Optional[User]:
+    if not token:
+        return None
+    async with async_session_maker() as session:
+        user_manager = UserManager(SQLAlchemyUserDatabase(session, User))
+        user = await get_jwt_strategy().read_token(token, user_manager)
+    if user is None or not user.is_active:
+        return None
+    return user
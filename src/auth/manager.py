@@ -2,7 +2,7 @@ from typing import Optional
 
 from fastapi import Depends, Request, HTTPException
 from fastapi_users import BaseUserManager, IntegerIDMixin, exceptions, models, schemas
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy import delete as sqlalchemy_delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,6 +11,8 @@ from src.auth.utils import get_user_db
 
 from src.config import SECRET_AUTH
 from src.database import async_session_maker, get_async_session
+from src.routes.Ticket.queue import queue_state
+from src.sharding import ensure_local_office, is_local_office
 
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
@@ -19,6 +21,8 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
+        if user.role == 'worker' and user.is_active and is_local_office(user.office_id):
+            queue_state.add_worker(user.office_id, user.id)
 
     async def on_after_forgot_password(
             self, user: User, token: str, request: Optional[Request] = None
@@ -31,6 +35,8 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             safe: bool = False,
             request: Optional[Request] = None,
     ) -> models.UP:
+        if user_create.role == 'worker':
+            ensure_local_office(user_create.office_id)
         await self.validate_password(user_create.password, user_create)
 
         existing_user = await self.user_db.get_by_email(user_create.email)
@@ -56,15 +62,36 @@ async def delete(
         user_id: int,
         session: AsyncSession = Depends(get_async_session)
 ) -> dict:
-    stmt = select(User).where(User.id == user_id)
+    # Workers can only be deleted by the node owning their office, so the
+    # queue state there drops them. Only on a miss is the office looked up.
+    local_user = or_(User.role != 'worker', User.office_id.in_(queue_state.local_offices()))
+    stmt = (
+        sqlalchemy_delete(User)
+        .where(User.id == user_id, local_user)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
     result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+    if result.scalar_one_or_none() is None:
+        query = select(User.office_id).where(User.id == user_id)
+        result = await session.execute(query)
+        office_id = result.scalar_one_or_none()
+        if office_id is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        ensure_local_office(office_id)
+
+        stmt = (
+            sqlalchemy_delete(User)
+            .where(User.id == user_id)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="User not found")
 
-    stmt1 = sqlalchemy_delete(User).where(User.id == user_id)
-    await session.execute(stmt1)
     await session.commit()  # Фиксируем изменения в базе данных
+    queue_state.remove_worker(user_id)
     print(f"User id {user_id} has been deleted.")
 
     return {"detail": "User deleted successfully"}
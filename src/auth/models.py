@@ -3,6 +3,7 @@ from datetime import datetime
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
 from sqlalchemy import Table, Column, Integer, String, TIMESTAMP, ForeignKey, JSON, Boolean, MetaData
 
+from src.config import DEFAULT_OFFICE_ID
 from src.database import Base, metadata
 
 
@@ -14,6 +15,7 @@ user = Table(
     Column("last_name", String, nullable=False),
     Column("email", String, nullable=False),
     Column("role", String, nullable=False, default="worker"),
+    Column("office_id", Integer, nullable=False, default=DEFAULT_OFFICE_ID, index=True),
     Column("hashed_password", String, nullable=False),
     Column("registered_at", TIMESTAMP, default=datetime.utcnow),
     Column("is_active", Boolean, default=True, nullable=False),
@@ -29,6 +31,7 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     email = Column(String, nullable=False)
     registered_at = Column(TIMESTAMP, default=datetime.utcnow)
     role = Column(String, nullable=False, default="worker")
+    office_id = Column(Integer, nullable=False, default=DEFAULT_OFFICE_ID, index=True)
     hashed_password: str = Column(String(length=1024), nullable=False)
     is_active: bool = Column(Boolean, default=True, nullable=False)
     is_superuser: bool = Column(Boolean, default=False, nullable=False)
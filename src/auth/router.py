@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, Request, Response, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.base_config import auth_backend, fastapi_users
+from src.auth.base_config import auth_backend, current_user, fastapi_users
 from src.auth.manager import delete
 from src.auth.models import User
 from src.auth.schemas import UserRead, UserCreate
@@ -31,5 +31,5 @@ async def delete_user(user_id: int,
     print("rate 0")
     return await delete(user_id, session)
 @router.post('/check', response_model=UserRead)
-async def get_info(user: User = Depends(fastapi_users.current_user())) -> UserRead:
+async def get_info(user: User = Depends(current_user)) -> UserRead:
     return user
\ No newline at end of file
@@ -2,6 +2,8 @@ from typing import Optional
 
 from fastapi_users import schemas
 
+from src.config import DEFAULT_OFFICE_ID
+
 
 class UserRead(schemas.BaseUser[int]):
     id: int
@@ -9,6 +11,7 @@ class UserRead(schemas.BaseUser[int]):
     last_name: str
     email: str
     role: str
+    office_id: int
     is_active: bool = True
     is_superuser: bool = False
     is_verified: bool = False
@@ -23,6 +26,7 @@ class UserCreate(schemas.BaseUserCreate):
     last_name: str
     password: str
     role: str
+    office_id: int = DEFAULT_OFFICE_ID
     is_active: Optional[bool] = True
     is_superuser: Optional[bool] = False
     is_verified: Optional[bool] = False
@@ -33,6 +37,7 @@ class UserUpdate(schemas.BaseUserUpdate):
     last_name: str
     password: str
     role: str
+    office_id: Optional[int] = None
     is_active: Optional[bool] = True
     is_superuser: Optional[bool] = False
     is_verified: Optional[bool] = False
@@ -10,3 +10,37 @@ DB_USER = os.environ.get("DB_USERNAME")
 DB_PASS = os.environ.get("DB_PASSWORD")
 
 SECRET_AUTH = os.environ.get("SECRET_KEY")
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP", DB_POOL_SIZE))
+
+DEFAULT_OFFICE_ID = int(os.environ.get("DEFAULT_OFFICE_ID", 1))
+NODE_NAME = os.environ.get("NODE_NAME", "node-1")
+CLUSTER_NODES = [node.strip() for node in os.environ.get("CLUSTER_NODES", NODE_NAME).split(",") if node.strip()]
+
+# Run uvicorn with the same --ws-max-size, so larger frames are refused before
+# they are buffered instead of after.
+WS_MAX_MESSAGE_SIZE = int(os.environ.get("WS_MAX_MESSAGE_SIZE", 4096))
+WS_RATE_LIMIT = float(os.environ.get("WS_RATE_LIMIT", 5))
+WS_RATE_BURST = int(os.environ.get("WS_RATE_BURST", 20))
+
+FAST_PATH_ROUTES = {
+    route.strip()
+    for route in os.environ.get(
+        "FAST_PATH_ROUTES",
+        "get_ticket_by_id,get_ticket_by_email,get_all_tickets,get_waiting_tickets,get_workers",
+    ).split(",")
+    if route.strip()
+}
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Profile-Token")
+PROFILE_MAX_TRACES = int(os.environ.get("PROFILE_MAX_TRACES", 50))
+
+SINGLE_FLIGHT_TTL = float(os.environ.get("SINGLE_FLIGHT_TTL", 0))
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 1))
+OUTBOX_CLAIM_TIMEOUT = float(os.environ.get("OUTBOX_CLAIM_TIMEOUT", 30))
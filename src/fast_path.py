@@ -0,0 +1,26 @@
+import json
+from typing import Any, Iterable
+
+from fastapi import Response
+from sqlalchemy.engine import Row
+
+from src.config import FAST_PATH_ROUTES
+
+
+# Routes listed in FAST_PATH_ROUTES select plain columns with Core and write the
+# response bytes straight from the rows. This skips ORM hydration, the identity
+# map and the re-validation of the result through the route's response_model.
+def fast_path_enabled(route: str) -> bool:
+    return route in FAST_PATH_ROUTES
+
+
+def dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def row_response(row: Row) -> Response:
+    return Response(content=dumps(row._asdict()), media_type="application/json")
+
+
+def rows_response(rows: Iterable[Row]) -> Response:
+    return Response(content=dumps([row._asdict() for row in rows]), media_type="application/json")
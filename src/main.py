@@ -1,14 +1,46 @@
-from fastapi import FastAPI
+import asyncio
+import time
+
+import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.auth.router import router as auth_router
+from src.database import engine
+from src.outbox.dispatcher import dispatcher
+from src.profiling import profile_request, profiling_enabled, should_profile
+from src.routes.debug.router import router as debug_router
+from src.routes.health.router import router as health_router
 from src.routes.Ticket.router import router as ticket_router
 from src.routes.websocket.router import router as websocket_router
 from src.routes.workers.router import router as worker_router
+from src.warmup import warm_up, warmup_state
+
+warmup_state.import_seconds = time.perf_counter() - import_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print(f"Imports finished in {warmup_state.import_seconds * 1000:.1f} ms")
+    await warm_up()
+    dispatcher_task = asyncio.create_task(dispatcher.run())
+    yield
+    warmup_state.ready = False
+    dispatcher_task.cancel()
+    try:
+        await dispatcher_task
+    except asyncio.CancelledError:
+        pass
+    await engine.dispose()
+
 
 app = FastAPI(
-    title="Queue APP"
+    title="Queue APP",
+    lifespan=lifespan
 )
 
 origins = [
@@ -27,11 +59,24 @@ app.add_middleware(
 )
 
 
+async def profile_requests(request: Request, call_next):
+    if not should_profile(request):
+        return await call_next(request)
+    return await profile_request(request, call_next)
+
+
+# Registered only when configured, so requests pay nothing when it is off.
+if profiling_enabled:
+    app.middleware("http")(profile_requests)
+
+
 # Auth router
 app.include_router(auth_router)
 app.include_router(ticket_router)
 app.include_router(websocket_router)
 app.include_router(worker_router)
+app.include_router(health_router)
+app.include_router(debug_router)
 
 
 
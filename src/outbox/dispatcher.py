@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import NODE_NAME, OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT, OUTBOX_POLL_INTERVAL
+from src.database import async_session_maker
+from src.outbox.models import OutboxEvent
+from src.profiling import span
+from src.routes.websocket.router import manager
+
+# First key of the two-key advisory lock, the office id is the second one.
+OUTBOX_LOCK_ID = 0x0B0C
+
+
+async def enqueue(session: AsyncSession, office_id: int, message: str):
+    # Written in the caller's transaction, so the event exists if and only if
+    # the ticket change is committed. Call dispatcher.notify() after commit.
+    #
+    # The per-office lock is held until that commit, so within an office ids
+    # become visible in the order they were assigned and the dispatcher never
+    # sees id N+1 before id N. There is no ordering across offices.
+    with span("outbox"):
+        await session.execute(select(func.pg_advisory_xact_lock(OUTBOX_LOCK_ID, office_id)))
+        stmt = insert(OutboxEvent).values(node=NODE_NAME, office_id=office_id, message=message)
+        await session.execute(stmt)
+
+
+class OutboxDispatcher:
+    def __init__(self):
+        self.wakeup: Optional[asyncio.Event] = None
+
+    def notify(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def claim(self) -> list:
+        now = datetime.utcnow()
+        batch = (
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.node == NODE_NAME,
+                or_(
+                    OutboxEvent.claimed_at == None,
+                    OutboxEvent.claimed_at < now - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT),
+                ),
+            )
+            .order_by(OutboxEvent.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(batch))
+            .values(claimed_at=now)
+            .returning(OutboxEvent.id, OutboxEvent.office_id, OutboxEvent.message)
+            .execution_options(synchronize_session=False)
+        )
+        async with async_session_maker() as session:
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+        return sorted(rows, key=lambda row: row.id)
+
+    async def drain(self) -> int:
+        # Claiming and deleting are two short transactions. The fan-out runs in
+        # between with no locks or connection held. Events are deleted only
+        # after they were handed to the WebSocket layer. A crash in between
+        # redelivers them once the claim times out, so delivery is at least
+        # once, and a redelivered event may arrive after newer ones.
+        rows = await self.claim()
+        for row in rows:
+            await manager.broadcast(row.message, row.office_id)
+        if rows:
+            stmt = (
+                delete(OutboxEvent)
+                .where(OutboxEvent.id.in_([row.id for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            async with async_session_maker() as session:
+                await session.execute(stmt)
+                await session.commit()
+        return len(rows)
+
+    async def run(self):
+        self.wakeup = asyncio.Event()
+        while True:
+            self.wakeup.clear()
+            try:
+                while await self.drain() == OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                print(f"Error dispatching outbox: {str(e)}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+dispatcher = OutboxDispatcher()
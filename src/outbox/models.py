@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+
+from src.database import Base
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    node = Column(String, nullable=False, index=True)
+    office_id = Column(Integer, nullable=False)
+    message = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    claimed_at = Column(TIMESTAMP, nullable=True)
@@ -0,0 +1,127 @@
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+
+from src.config import PROFILE_HEADER, PROFILE_MAX_TRACES, PROFILE_SAMPLE_RATE, PROFILE_TOKEN
+from src.database import engine
+
+profiling_enabled = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+
+
+class Trace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.status_code: Optional[int] = None
+        self.total = 0.0
+        # "outbox" covers enqueueing broadcast events, including the wait for
+        # the per-office lock. Its queries are also counted in "db".
+        self.spans: Dict[str, float] = {"db": 0.0, "outbox": 0.0}
+        self.counts: Dict[str, int] = {"db": 0, "outbox": 0}
+        self.profile: Optional[str] = None
+
+    def add(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "total_ms": self.total * 1000,
+            "python_ms": max(self.total - self.spans["db"], 0.0) * 1000,
+            "spans": {
+                name: {"ms": seconds * 1000, "count": self.counts.get(name, 0)}
+                for name, seconds in self.spans.items()
+            },
+            "profile": self.profile,
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+traces: Deque[Trace] = deque(maxlen=PROFILE_MAX_TRACES)
+_profiler_busy = False
+
+
+@contextmanager
+def span(name: str):
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_trace.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace.get()
+    if trace is not None and conn.info.get("query_started"):
+        trace.add("db", time.perf_counter() - conn.info["query_started"].pop())
+
+
+if profiling_enabled:
+    # SQLAlchemy runs these inside a greenlet that shares the request's
+    # contextvars, so the current trace is visible here.
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def should_profile(request: Request) -> bool:
+    if PROFILE_TOKEN:
+        token = request.headers.get(PROFILE_HEADER)
+        if token and hmac.compare_digest(token, PROFILE_TOKEN):
+            return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+async def profile_request(request: Request, call_next):
+    global _profiler_busy
+
+    trace = Trace(request.method, request.url.path)
+    reset_token = current_trace.set(trace)
+
+    # Only one cProfile can be active per thread. Requests profiled while
+    # another one is running only get their spans recorded. The profile also
+    # includes whatever other coroutines ran while this request was awaiting.
+    profiler = None
+    if not _profiler_busy:
+        _profiler_busy = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        trace.status_code = response.status_code
+        return response
+    finally:
+        trace.total = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            _profiler_busy = False
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(30)
+            trace.profile = output.getvalue()
+        current_trace.reset(reset_token)
+        traces.append(trace)
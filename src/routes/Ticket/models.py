@@ -4,6 +4,7 @@ from sqlalchemy.orm import relationship
 
 from src.auth.models import User
 
+from src.config import DEFAULT_OFFICE_ID
 from src.database import Base
 
 class Tickets(Base):
@@ -13,4 +14,7 @@ class Tickets(Base):
     email = Column(String, nullable=False)
     status = Column(String, nullable=False, default='waiting')
     worker_id = Column(Integer, ForeignKey(User.id))
+    office_id = Column(Integer, nullable=False, default=DEFAULT_OFFICE_ID, index=True)
 
+
+ticket_columns = (Tickets.id, Tickets.email, Tickets.status, Tickets.worker_id, Tickets.office_id)
@@ -0,0 +1,90 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class OfficeQueue:
+    def __init__(self):
+        self.waiting: Dict[int, int] = {}
+        self.workers: Set[int] = set()
+        self.online: Dict[int, int] = {}
+        # Entries are (offline, waiting, worker_id). Outdated entries are not
+        # removed on update, they are skipped when they reach the top.
+        self.heap: List[Tuple[int, int, int]] = []
+
+    def key(self, worker_id: int) -> Tuple[int, int, int]:
+        return 0 if self.online.get(worker_id) else 1, self.waiting.get(worker_id, 0), worker_id
+
+    def push(self, worker_id: int):
+        if worker_id not in self.workers:
+            return
+        heapq.heappush(self.heap, self.key(worker_id))
+        if len(self.heap) > 2 * len(self.workers) + 64:
+            self.heap = [self.key(w) for w in self.workers]
+            heapq.heapify(self.heap)
+
+    def pick(self) -> Optional[int]:
+        while self.heap:
+            entry = self.heap[0]
+            worker_id = entry[2]
+            if worker_id in self.workers and entry == self.key(worker_id):
+                return worker_id
+            heapq.heappop(self.heap)
+        return None
+
+
+class QueueState:
+    def __init__(self):
+        self.offices: Dict[int, OfficeQueue] = {}
+
+    def office(self, office_id: int) -> OfficeQueue:
+        if office_id not in self.offices:
+            self.offices[office_id] = OfficeQueue()
+        return self.offices[office_id]
+
+    def load(self, workers: Iterable[Tuple[int, int]], waiting: Iterable[Tuple[int, int, int]]):
+        self.offices = {}
+        for office_id, worker_id, count in waiting:
+            if worker_id is not None:
+                self.office(office_id).waiting[worker_id] = count
+        for office_id, worker_id in workers:
+            self.add_worker(office_id, worker_id)
+
+    def local_offices(self) -> List[int]:
+        return list(self.offices)
+
+    def increment(self, office_id: int, worker_id: int):
+        office = self.office(office_id)
+        office.waiting[worker_id] = office.waiting.get(worker_id, 0) + 1
+        office.push(worker_id)
+
+    def decrement(self, office_id: int, worker_id: int):
+        office = self.office(office_id)
+        office.waiting[worker_id] = max(office.waiting.get(worker_id, 0) - 1, 0)
+        office.push(worker_id)
+
+    def add_worker(self, office_id: int, worker_id: int):
+        office = self.office(office_id)
+        office.workers.add(worker_id)
+        office.push(worker_id)
+
+    def remove_worker(self, worker_id: int):
+        for office in self.offices.values():
+            office.workers.discard(worker_id)
+            office.waiting.pop(worker_id, None)
+            office.online.pop(worker_id, None)
+
+    def set_online(self, office_id: int, worker_id: int, online: bool):
+        office = self.office(office_id)
+        sockets = office.online.get(worker_id, 0) + (1 if online else -1)
+        if sockets > 0:
+            office.online[worker_id] = sockets
+        else:
+            office.online.pop(worker_id, None)
+        office.push(worker_id)
+
+    def pick(self, office_id: int) -> Optional[int]:
+        # Online workers come first, then the shortest queue, then the lowest id.
+        return self.office(office_id).pick()
+
+
+queue_state = QueueState()
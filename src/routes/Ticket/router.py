@@ -1,13 +1,17 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from sqlalchemy import insert, select, delete, update
+from sqlalchemy import insert, literal, select, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_async_session
-from src.routes.websocket.router import manager
+from src.fast_path import fast_path_enabled, row_response, rows_response
+from src.sharding import ensure_local_office
+from src.single_flight import single_flight
+from src.outbox.dispatcher import dispatcher, enqueue
 
-from src.routes.Ticket.models import Tickets
+from src.routes.Ticket.models import Tickets, ticket_columns
+from src.routes.Ticket.queue import queue_state
 from src.auth.models import User
 
 from src.routes.Ticket.schemas import TicketModel, TicketCreate
@@ -20,40 +24,103 @@ router = APIRouter(
 )
 
 
-@router.post("/create", response_model=TicketModel)
-async def create_ticket(new_ticket: TicketCreate, response: Response, session: AsyncSession = Depends(get_async_session)) -> TicketModel:
-    query = select(User).where(User.id == new_ticket.worker_id, User.role == 'worker')
+async def mutate_local_ticket(session: AsyncSession, ticket_id: int, build_stmt):
+    # The statement is restricted to offices this node owns, so a foreign
+    # ticket is never touched. Only on a miss is the ticket's office looked up,
+    # to tell a 404 from a 421, or to retry for a local office not seen yet.
+    result = await session.execute(build_stmt(Tickets.office_id.in_(queue_state.local_offices())))
+    ticket = result.first()
+    if ticket is not None:
+        return ticket
+
+    query = select(Tickets.office_id).where(Tickets.id == ticket_id)
     result = await session.execute(query)
-    if result.scalars().first() is None:
-        raise HTTPException(status_code=404, detail="Worker not found")
+    office_id = result.scalar_one_or_none()
+    if office_id is None or office_id in queue_state.offices:
+        return None
+    ensure_local_office(office_id)
+    queue_state.office(office_id)
 
-    stmt = insert(Tickets).values(
-        email=new_ticket.email,
-        worker_id=new_ticket.worker_id,
-        status="waiting"
-    ).returning(Tickets.id)
-    result = await session.execute(stmt)
-    await session.commit()
+    result = await session.execute(build_stmt(Tickets.office_id == office_id))
+    return result.first()
 
-    created_ticket_id = result.scalar_one()
 
-    ticket_data = TicketModel(id=created_ticket_id, email=new_ticket.email, worker_id=new_ticket.worker_id, status="waiting")
+@router.post("/create", response_model=TicketModel)
+async def create_ticket(new_ticket: TicketCreate, response: Response, session: AsyncSession = Depends(get_async_session)) -> TicketModel:
+    auto = new_ticket.worker_id == "auto"
+    if auto:
+        office_id = new_ticket.office_id
+        ensure_local_office(office_id)
+    else:
+        query = select(User).where(User.id == new_ticket.worker_id, User.role == 'worker')
+        result = await session.execute(query)
+        worker = result.scalars().first()
+        if worker is None:
+            raise HTTPException(status_code=404, detail="Worker not found")
+        ensure_local_office(worker.office_id)
+        office_id = worker.office_id
+        worker_id = worker.id
+
+    while True:
+        if auto:
+            worker_id = queue_state.pick(office_id)
+            if worker_id is None:
+                raise HTTPException(status_code=404, detail="No available workers")
+
+        # Reserve the place before the first await, so concurrent "auto" requests
+        # already see this ticket when they pick a worker.
+        queue_state.increment(office_id, worker_id)
+        try:
+            # Inserted only while the worker row is still an active worker of
+            # this office, the in-memory state may lag behind other nodes.
+            active_worker = select(
+                User.id, User.office_id, literal(new_ticket.email), literal("waiting")
+            ).where(User.id == worker_id, User.role == 'worker', User.is_active == True, User.office_id == office_id)
+            stmt = (
+                insert(Tickets)
+                .from_select(["worker_id", "office_id", "email", "status"], active_worker)
+                .returning(Tickets.id)
+            )
+            result = await session.execute(stmt)
+            created_ticket_id = result.scalar_one_or_none()
+
+            if created_ticket_id is not None:
+                ticket_data = TicketModel(id=created_ticket_id, email=new_ticket.email, worker_id=worker_id, office_id=office_id, status="waiting")
+
+                await enqueue(session, office_id, SendToWebsocket("new_ticket", worker_id, ticket_data.json()).to_json())
+                await session.commit()
+        except Exception:
+            queue_state.decrement(office_id, worker_id)
+            raise
+
+        if created_ticket_id is not None:
+            break
+        queue_state.remove_worker(worker_id)
+        if not auto:
+            raise HTTPException(status_code=404, detail="Worker not found")
+    dispatcher.notify()
 
-    await manager.broadcast(SendToWebsocket("new_ticket", new_ticket.worker_id, ticket_data.json()).to_json())
     response.set_cookie(key="email", value=new_ticket.email)
     return ticket_data
 
 
 @router.delete("/{ticket_id}", response_model=ReturnMessage)
 async def delete_ticket(ticket_id: int, session: AsyncSession = Depends(get_async_session)) -> ReturnMessage:
-    query = select(Tickets).where(Tickets.id == ticket_id)
-    result = await session.execute(query)
-    if result.scalars().first() is None:
+    def build_stmt(local_office):
+        return (
+            delete(Tickets)
+            .where(Tickets.id == ticket_id, local_office)
+            .returning(*Tickets.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+
+    ticket = await mutate_local_ticket(session, ticket_id, build_stmt)
+    if ticket is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    stmt = delete(Tickets).where(Tickets.id == ticket_id)
-    await session.execute(stmt)
     await session.commit()
+    if ticket.status == 'waiting':
+        queue_state.decrement(ticket.office_id, ticket.worker_id)
     return ReturnMessage(
         message="Ticket deleted",
         status="ok"
@@ -63,6 +130,13 @@ async def delete_ticket(ticket_id: int, session: AsyncSession = Depends(get_asyn
 @router.get("/{ticket_id}", response_model=TicketModel)
 async def get_ticket_by_id(ticket_id: int,
                           session: AsyncSession = Depends(get_async_session)) -> TicketModel:
+    if fast_path_enabled("get_ticket_by_id"):
+        result = await session.execute(select(*ticket_columns).where(Tickets.id == ticket_id))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return row_response(row)
+
     query = select(Tickets).where(Tickets.id == ticket_id)
     result = await session.execute(query)
     ticket = result.scalars().first()
@@ -84,6 +158,13 @@ async def get_ticket_by_email(request: Request,
     if not email:
         raise HTTPException(status_code=400, detail="Email is required")
 
+    if fast_path_enabled("get_ticket_by_email"):
+        result = await session.execute(select(*ticket_columns).where(Tickets.email == email))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return row_response(row)
+
     query = select(Tickets).where(Tickets.email == email)
     result = await session.execute(query)
     ticket = result.scalars().first()
@@ -96,6 +177,16 @@ async def get_ticket_by_email(request: Request,
 
 @router.get("/all/user/{user_id}", response_model=List[TicketModel])
 async def get_all_tickets(user_id: int, session: AsyncSession = Depends(get_async_session)) -> List[TicketModel]:
+    if fast_path_enabled("get_all_tickets"):
+        result = await session.execute(select(User.id).where(User.id == user_id, User.role == 'worker'))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Worker not found")
+        result = await session.execute(select(*ticket_columns).where(Tickets.worker_id == user_id))
+        rows = result.all()
+        if len(rows) == 0:
+            raise HTTPException(status_code=404, detail="Tickets not found")
+        return rows_response(rows)
+
     query1 = select(User).where(User.id == user_id, User.role == 'worker')
     result1 = await session.execute(query1)
     if result1.scalars().first() is None:
@@ -109,7 +200,20 @@ async def get_all_tickets(user_id: int, session: AsyncSession = Depends(get_asyn
     return tickets
 
 @router.get("/all/user/{user_id}/waiting", response_model=List[TicketModel])
-async def get_all_tickets(user_id: int, session: AsyncSession = Depends(get_async_session)) -> List[TicketModel]:
+@single_flight()
+async def get_waiting_tickets(user_id: int, session: AsyncSession = Depends(get_async_session)) -> List[TicketModel]:
+    if fast_path_enabled("get_waiting_tickets"):
+        result = await session.execute(select(User.id).where(User.id == user_id, User.role == 'worker'))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Worker not found")
+        result = await session.execute(
+            select(*ticket_columns).where(Tickets.worker_id == user_id, Tickets.status == 'waiting')
+        )
+        rows = result.all()
+        if len(rows) == 0:
+            raise HTTPException(status_code=404, detail="Tickets not found")
+        return rows_response(rows)
+
     query1 = select(User).where(User.id == user_id, User.role == 'worker')
     result1 = await session.execute(query1)
     if result1.scalars().first() is None:
@@ -127,19 +231,25 @@ async def get_all_tickets(user_id: int, session: AsyncSession = Depends(get_asyn
 @router.get("/{ticket_id}/cancel", response_model=ReturnMessage)
 async def cancel_ticket(ticket_id: int,
                         session: AsyncSession = Depends(get_async_session)) -> ReturnMessage:
-    query1 = select(Tickets).where(Tickets.id == ticket_id, Tickets.status == 'waiting')
-    result1 = await session.execute(query1)
-    ticket = result1.scalars().first()
+    def build_stmt(local_office):
+        return (
+            update(Tickets)
+            .where(Tickets.id == ticket_id, Tickets.status == 'waiting', local_office)
+            .values(status='cancelled')
+            .returning(*Tickets.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+
+    ticket = await mutate_local_ticket(session, ticket_id, build_stmt)
     if ticket is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    stmt = update(Tickets).where(Tickets.id == ticket_id).values(status='cancelled')
-    await session.execute(stmt)
-    await session.commit()
+    ticket_data = TicketModel(**ticket._asdict())
+    await enqueue(session, ticket.office_id, SendToWebsocket("cancel_ticket", ticket.worker_id, ticket_data.json()).to_json())
 
-    ticket_data = TicketModel(id=ticket.id, email=ticket.email, worker_id=ticket.worker_id, status=ticket.status)
-
-    await manager.broadcast(SendToWebsocket("cancel_ticket", ticket.worker_id, ticket_data.json()).to_json())
+    await session.commit()
+    queue_state.decrement(ticket.office_id, ticket.worker_id)
+    dispatcher.notify()
 
     return ReturnMessage(
         message="Ticket successfully cancelled",
@@ -160,7 +270,7 @@ async def get_ticket_queue(ticket_id: int, session: AsyncSession = Depends(get_a
     if worker is None:
         raise HTTPException(status_code=404, detail="Worker not found")
 
-    query = select(Tickets).where(Tickets.worker_id == worker.id, Tickets.status == 'waiting')
+    query = select(Tickets).where(Tickets.office_id == ticket.office_id, Tickets.worker_id == worker.id, Tickets.status == 'waiting').order_by(Tickets.id)
     result = await session.execute(query)
     tickets = result.scalars().all()
 
@@ -1,17 +1,23 @@
+from typing import Literal, Union
+
 from pydantic import BaseModel
 
+from src.config import DEFAULT_OFFICE_ID
+
 
 class TicketModel(BaseModel):
     id: int
     email: str
     status: str
     worker_id: int
+    office_id: int
 
     class Config:
         orm_mode = True
 
 class TicketCreate(BaseModel):
     email: str
-    worker_id: int
+    worker_id: Union[int, Literal["auto"]] = "auto"
+    office_id: int = DEFAULT_OFFICE_ID
 
 
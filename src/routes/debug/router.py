@@ -0,0 +1,23 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.auth.base_config import current_user
+from src.auth.models import User
+from src.profiling import traces
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"]
+)
+
+
+@router.get("/traces")
+async def get_traces(limit: int = 10, user: User = Depends(current_user)) -> List[dict]:
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=403,
+            detail="You do not have permission to perform this operation.",
+        )
+
+    return [trace.to_dict() for trace in reversed(traces)][:limit]
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException
+
+from src.schemas import ReturnMessage
+from src.warmup import warmup_state
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+
+@router.get("/live", response_model=ReturnMessage)
+async def live() -> ReturnMessage:
+    return ReturnMessage(
+        message="Alive",
+        status="ok"
+    )
+
+
+@router.get("/ready", response_model=ReturnMessage)
+async def ready() -> ReturnMessage:
+    if not warmup_state.ready:
+        raise HTTPException(status_code=503, detail="Warming up")
+
+    return ReturnMessage(
+        message=f"Ready, warm-up took {warmup_state.warmup_seconds * 1000:.1f} ms",
+        status="ok"
+    )
@@ -1,46 +1,152 @@
 import json
-from typing import List
+import time
+from typing import Dict, List, Optional, Set
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from src.auth.base_config import cookie_transport, get_user_by_token
+from src.auth.models import User
+from src.config import DEFAULT_OFFICE_ID, WS_MAX_MESSAGE_SIZE, WS_RATE_BURST, WS_RATE_LIMIT
+from src.routes.Ticket.queue import queue_state
+from src.routes.websocket.schemas import InboundMessage
+from src.sharding import is_local_office
 
 router = APIRouter(
     prefix="/ws",
     tags=["websocket"]
 )
 
+
+def office_channel(office_id: int) -> str:
+    return f"office:{office_id}"
+
+
+def worker_channel(worker_id: int) -> str:
+    return f"worker:{worker_id}"
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, office_id: int, user: Optional[User] = None):
+        self.websocket = websocket
+        self.office_id = office_id
+        self.user = user
+        self.channels: Set[str] = {office_channel(office_id)}
+        self.tokens = float(WS_RATE_BURST)
+        self.updated = time.monotonic()
+
+    @property
+    def is_worker(self) -> bool:
+        return self.user is not None and self.user.role == 'worker'
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(WS_RATE_BURST, self.tokens + (now - self.updated) * WS_RATE_LIMIT)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def can_subscribe(self, channel: str) -> bool:
+        if channel == office_channel(self.office_id):
+            return True
+        return self.user is not None and channel == worker_channel(self.user.id)
+
+    def can_publish(self, channel: str) -> bool:
+        return self.is_worker and self.can_subscribe(channel)
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[int, List[Connection]] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, office_id: int, user: Optional[User] = None) -> Connection:
         await websocket.accept()
-        print(f"WebSocket connected: {websocket}")
-        self.active_connections.append(websocket)
+        connection = Connection(websocket, office_id, user)
+        print(f"WebSocket connected: {websocket} (office {office_id})")
+        self.active_connections.setdefault(office_id, []).append(connection)
+        if connection.is_worker:
+            queue_state.set_online(office_id, user.id, True)
+        return connection
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        print(f"WebSocket disconnected: {websocket}")
+    def disconnect(self, connection: Connection):
+        connections = self.active_connections.get(connection.office_id, [])
+        if connection in connections:
+            connections.remove(connection)
+            if connection.is_worker:
+                queue_state.set_online(connection.office_id, connection.user.id, False)
+        if not connections:
+            self.active_connections.pop(connection.office_id, None)
+        print(f"WebSocket disconnected: {connection.websocket} (office {connection.office_id})")
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+    async def publish(self, message: str, channel: str, office_id: int):
+        for connection in list(self.active_connections.get(office_id, [])):
+            if channel not in connection.channels:
+                continue
             try:
-                await connection.send_text(message)
+                await connection.websocket.send_text(message)
             except Exception as e:
                 print(f"Error broadcasting message: {str(e)}")
 
+    async def broadcast(self, message: str, office_id: int):
+        await self.publish(message, office_channel(office_id), office_id)
+
 
 manager = ConnectionManager()
 
+
+async def handle_message(connection: Connection, data: str) -> bool:
+    # Every frame costs a rate-limit token. Rate limited and malformed frames
+    # are dropped without a reply. Oversized frames close the socket, and
+    # False tells the caller to stop reading.
+    if not connection.allow():
+        return True
+    if len(data.encode()) > WS_MAX_MESSAGE_SIZE:
+        await connection.websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+        return False
+    try:
+        message = InboundMessage.parse_raw(data)
+    except ValidationError:
+        return True
+
+    if message.command == "ping":
+        await connection.websocket.send_text(json.dumps({"command": "pong", "id": message.id}))
+    elif message.command == "subscribe":
+        if message.channel and connection.can_subscribe(message.channel):
+            connection.channels.add(message.channel)
+    elif message.command == "unsubscribe":
+        if message.channel:
+            connection.channels.discard(message.channel)
+    elif message.command == "publish":
+        if message.channel and connection.can_publish(message.channel):
+            await manager.publish(json.dumps({
+                "command": "publish",
+                "channel": message.channel,
+                "from": connection.user.id,
+                "data": message.data,
+            }), message.channel, connection.office_id)
+    return True
+
+
 @router.websocket("")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, office_id: int = DEFAULT_OFFICE_ID):
+    user = await get_user_by_token(websocket.cookies.get(cookie_transport.cookie_name))
+    if user is not None:
+        office_id = user.office_id
+    if not is_local_office(office_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    connection = await manager.connect(websocket, office_id, user)
     try:
         while True:
             data = await websocket.receive_text()
-            print(f"Received message: {data}")
-            await manager.broadcast(data)
+            if not await handle_message(connection, data):
+                break
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print("WebSocket connection closed")
     except Exception as e:
         print(f"WebSocket error: {str(e)}")
+    finally:
+        manager.disconnect(connection)
@@ -0,0 +1,10 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class InboundMessage(BaseModel):
+    command: Literal["subscribe", "unsubscribe", "ping", "publish"]
+    channel: Optional[str] = None
+    id: Optional[int] = None
+    data: Any = None
@@ -1,18 +1,20 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Request, Response, HTTPException
-from fastapi_users import FastAPIUsers
 
-from sqlalchemy import select, update
+from sqlalchemy import and_, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.base_config import auth_backend
+from src.auth.base_config import current_user
 from src.auth.models import User
 from src.routes.Ticket.models import Tickets
 
 from src.database import async_session_maker, get_async_session
-from src.auth.manager import get_user_manager
-from src.routes.websocket.router import manager
+from src.fast_path import fast_path_enabled, rows_response
+from src.sharding import ensure_local_office
+from src.single_flight import single_flight
+from src.outbox.dispatcher import dispatcher, enqueue
+from src.routes.Ticket.queue import queue_state
 
 from src.schemas import ReturnMessage, WorkerInformation, SendToWebsocket
 from src.routes.Ticket.schemas import TicketModel
@@ -22,19 +24,31 @@ router = APIRouter(
     tags=["workers"],
 )
 
-fastapi_users = FastAPIUsers[User, int](
-    get_user_manager,
-    [auth_backend],
-)
-
 
 @router.get("/", response_model=List[WorkerInformation])
+@single_flight()
 async def get_workers(
+        office_id: Optional[int] = None,
         session: AsyncSession = Depends(get_async_session),
 ) -> List[WorkerInformation]:
+    if fast_path_enabled("get_workers"):
+        query = (
+            select(User.id, User.first_name, User.last_name, User.email, User.office_id,
+                   func.count(Tickets.id).label("queue"))
+            .outerjoin(Tickets, and_(Tickets.worker_id == User.id, Tickets.status == 'waiting'))
+            .where(User.role == 'worker')
+            .group_by(User.id)
+        )
+        if office_id is not None:
+            query = query.where(User.office_id == office_id)
+        result = await session.execute(query)
+        return rows_response(result.all())
+
     workers_list = []
 
     query = select(User).where(User.role == 'worker')
+    if office_id is not None:
+        query = query.where(User.office_id == office_id)
     result = await session.execute(query)
     workers = result.scalars().all()
 
@@ -49,6 +63,7 @@ async def get_workers(
                 first_name=worker.first_name,
                 last_name=worker.last_name,
                 email=worker.email,
+                office_id=worker.office_id,
                 queue=len(tickets)
             )
         )
@@ -57,7 +72,7 @@ async def get_workers(
 
 @router.get("/ticket/next", response_model=TicketModel)
 async def get_next_ticket(
-    user: User = Depends(fastapi_users.current_user()),
+    user: User = Depends(current_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> TicketModel:
     if user.role != 'worker':
@@ -65,38 +80,51 @@ async def get_next_ticket(
             status_code=403,
             detail="You do not have permission to perform this operation.",
         )
+    ensure_local_office(user.office_id)
 
-    query = select(Tickets).where(Tickets.worker_id == user.id, Tickets.status == 'processing')
-    result = await session.execute(query)
-    prosessed_ticket = result.scalars().first()
-    if prosessed_ticket:
-        stmt = update(Tickets).where(Tickets.id == prosessed_ticket.id).values(status="finised")
-        await session.execute(stmt)
-
-
-
-    query = select(Tickets).where(Tickets.worker_id == user.id, Tickets.status == 'waiting').order_by(Tickets.id)
-    result = await session.execute(query)
-    ticket = result.scalars().first()
+    stmt = (
+        update(Tickets)
+        .where(Tickets.office_id == user.office_id, Tickets.worker_id == user.id, Tickets.status == 'processing')
+        .values(status="finished")
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(stmt)
+
+    next_ticket_id = (
+        select(Tickets.id)
+        .where(Tickets.office_id == user.office_id, Tickets.worker_id == user.id, Tickets.status == 'waiting')
+        .order_by(Tickets.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Tickets)
+        .where(Tickets.id == next_ticket_id)
+        .values(status="processing")
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    ticket = result.first()
     if ticket is None:
         raise HTTPException(
             status_code=404,
             detail="No tickets found",
         )
-    else:
-        stmt = update(Tickets).where(Tickets.id == ticket.id).values(status="processing")
-        await session.execute(stmt)
-        ticket_data = TicketModel(id=ticket.id, email=ticket.email, worker_id=ticket.worker_id, status=ticket.status)
 
-        await manager.broadcast(SendToWebsocket("show_screen", 00, ticket_data.json()).to_json())
+    ticket_data = TicketModel(**ticket._asdict())
+    await enqueue(session, ticket.office_id, SendToWebsocket("show_screen", 00, ticket_data.json()).to_json())
     await session.commit()  # Ensure the change is committed to the database
+    queue_state.decrement(ticket.office_id, ticket.worker_id)
+    dispatcher.notify()
 
-    return ticket
+    return ticket_data
 
 
 @router.get("/ticket/finish", response_model=TicketModel)
 async def finish_ticket(
-        user: User = Depends(fastapi_users.current_user()),
+        user: User = Depends(current_user),
         session: AsyncSession = Depends(get_async_session)
 )-> TicketModel:
     if user.role != 'worker':
@@ -104,25 +132,21 @@ async def finish_ticket(
             status_code=403,
             detail="You do not have permission to perform this operation."
         )
-    query = select(Tickets).where(Tickets.worker_id == user.id, Tickets.status == 'processing')
-    result = await session.execute(query)
-    prosessed_ticket = result.scalars().first()
+    stmt = (
+        update(Tickets)
+        .where(Tickets.office_id == user.office_id, Tickets.worker_id == user.id, Tickets.status == 'processing')
+        .values(status="finished")
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    prosessed_ticket = result.first()
 
     if prosessed_ticket is None:
         raise HTTPException(
-            status_code=403,
+            status_code=404,
             detail="No tickets found",
         )
-
-    stmt = update(Tickets).where(Tickets.id == prosessed_ticket.id).values(status="finished")
-    result = await session.execute(stmt)
     await session.commit()
 
-
-    return TicketModel(
-        id=prosessed_ticket.id,
-        email=prosessed_ticket.email,
-        worker_id=prosessed_ticket.worker_id,
-        status="finished",
-    )
-
+    return TicketModel(**prosessed_ticket._asdict())
@@ -27,6 +27,7 @@ class WorkerInformation(BaseModel):
     first_name: str
     last_name: str
     email: str
+    office_id: int
     queue: int
 
 class ResponseQueue(BaseModel):
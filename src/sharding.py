@@ -0,0 +1,43 @@
+import bisect
+import hashlib
+from typing import List
+
+from fastapi import HTTPException
+
+from src.config import CLUSTER_NODES, NODE_NAME
+
+
+def _hash(key: str) -> int:
+    return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+
+class HashRing:
+    def __init__(self, nodes: List[str], replicas: int = 100):
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        self.ring = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self.keys = [key for key, _ in self.ring]
+
+    def get_node(self, office_id: int) -> str:
+        index = bisect.bisect(self.keys, _hash(f"office-{office_id}")) % len(self.keys)
+        return self.ring[index][1]
+
+
+if not CLUSTER_NODES:
+    raise RuntimeError("CLUSTER_NODES is empty, set it to a comma separated list of node names")
+if NODE_NAME not in CLUSTER_NODES:
+    raise RuntimeError(f"NODE_NAME {NODE_NAME!r} is not one of CLUSTER_NODES {CLUSTER_NODES!r}")
+
+ring = HashRing(CLUSTER_NODES)
+
+
+def is_local_office(office_id: int) -> bool:
+    return ring.get_node(office_id) == NODE_NAME
+
+
+def ensure_local_office(office_id: int):
+    if not is_local_office(office_id):
+        raise HTTPException(
+            status_code=421,
+            detail=f"Office {office_id} is served by {ring.get_node(office_id)}",
+        )
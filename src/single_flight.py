@@ -0,0 +1,77 @@
+import asyncio
+import functools
+import time
+from typing import Any, Dict, Hashable, Tuple
+
+from fastapi import Request, Response, WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import SINGLE_FLIGHT_TTL
+from src.database import async_session_maker
+
+MAX_CACHED_RESULTS = 1024
+
+
+def _make_key(args: tuple, kwargs: dict) -> Hashable:
+    # Per-request objects never make two requests different for the result.
+    skipped = (AsyncSession, Request, Response, WebSocket)
+    return args, tuple(sorted((name, value) for name, value in kwargs.items() if not isinstance(value, skipped)))
+
+
+def _copy(result: Any) -> Any:
+    if isinstance(result, Response):
+        return Response(content=result.body, status_code=result.status_code, headers=dict(result.headers))
+    return result
+
+
+async def _call_with_own_session(func, args: tuple, kwargs: dict) -> Any:
+    # The callers' sessions belong to their own dependency stacks and are
+    # closed when that caller goes away, so the shared call opens its own.
+    async with async_session_maker() as session:
+        kwargs = {
+            name: session if isinstance(value, AsyncSession) else value
+            for name, value in kwargs.items()
+        }
+        return await func(*args, **kwargs)
+
+
+def single_flight(ttl: float = SINGLE_FLIGHT_TTL):
+    """Concurrent calls with the same arguments share one in-flight call.
+
+    The shared call runs on its own session instead of the first caller's.
+    With ttl > 0 a successful result is also reused for that many seconds.
+    """
+    def decorator(func):
+        in_flight: Dict[Hashable, asyncio.Future] = {}
+        cache: Dict[Hashable, Tuple[float, Any]] = {}
+
+        def done(key: Hashable, future: asyncio.Future):
+            in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None or ttl <= 0:
+                return
+            now = time.monotonic()
+            if len(cache) >= MAX_CACHED_RESULTS:
+                for expired in [k for k, (expires, _) in cache.items() if expires <= now]:
+                    del cache[expired]
+            if len(cache) < MAX_CACHED_RESULTS:
+                cache[key] = (now + ttl, future.result())
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            if ttl > 0:
+                cached = cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    return _copy(cached[1])
+
+            future = in_flight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(_call_with_own_session(func, args, kwargs))
+                in_flight[key] = future
+                future.add_done_callback(functools.partial(done, key))
+            # Shielded, so a disconnecting caller does not cancel the others.
+            return _copy(await asyncio.shield(future))
+
+        return wrapper
+
+    return decorator
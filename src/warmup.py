@@ -0,0 +1,146 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from sqlalchemy import and_, delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import User
+from src.config import DB_MAX_OVERFLOW, DB_POOL_SIZE, DB_POOL_WARMUP, NODE_NAME
+from src.database import engine
+from src.outbox.dispatcher import OUTBOX_LOCK_ID
+from src.outbox.models import OutboxEvent
+from src.routes.Ticket.models import Tickets, ticket_columns
+from src.routes.Ticket.queue import queue_state
+from src.sharding import is_local_office
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.import_seconds = 0.0
+        self.warmup_seconds = 0.0
+
+
+warmup_state = WarmupState()
+
+def hot_statements(office_id: int) -> list:
+    # Same shapes as the default queries and mutations issued by the routes,
+    # so that both the SQLAlchemy compiled cache and the asyncpg prepared
+    # statement cache of every pooled connection are filled before the first
+    # real request arrives. Every WHERE matches no row, and the outbox insert
+    # is rolled back. Each connection gets its own nonexistent office_id, so
+    # they do not wait on each other's advisory lock.
+    workers_queue = (
+        select(User.id, User.first_name, User.last_name, User.email, User.office_id,
+               func.count(Tickets.id).label("queue"))
+        .outerjoin(Tickets, and_(Tickets.worker_id == User.id, Tickets.status == 'waiting'))
+        .where(User.role == 'worker')
+        .group_by(User.id)
+    )
+    return [
+        # fastapi-users current_user and worker lookups
+        select(User).where(User.id == 0),
+        select(User).where(User.id == 0, User.role == 'worker'),
+        select(User.id).where(User.id == 0, User.role == 'worker'),
+        # create_ticket and the outbox
+        insert(Tickets).from_select(
+            ["worker_id", "office_id", "email", "status"],
+            select(User.id, User.office_id, literal(""), literal("waiting"))
+            .where(User.id == 0, User.role == 'worker', User.is_active == True, User.office_id == office_id),
+        ).returning(Tickets.id),
+        select(func.pg_advisory_xact_lock(OUTBOX_LOCK_ID, office_id)),
+        insert(OutboxEvent).values(node=NODE_NAME, office_id=office_id, message=""),
+        # delete_ticket and cancel_ticket
+        delete(Tickets)
+        .where(Tickets.id == 0, Tickets.office_id.in_([office_id]))
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False),
+        update(Tickets)
+        .where(Tickets.id == 0, Tickets.status == 'waiting', Tickets.office_id.in_([office_id]))
+        .values(status='cancelled')
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False),
+        # get_next_ticket and finish_ticket
+        update(Tickets)
+        .where(Tickets.office_id == office_id, Tickets.worker_id == 0, Tickets.status == 'processing')
+        .values(status="finished")
+        .execution_options(synchronize_session=False),
+        update(Tickets)
+        .where(Tickets.id == (
+            select(Tickets.id)
+            .where(Tickets.office_id == office_id, Tickets.worker_id == 0, Tickets.status == 'waiting')
+            .order_by(Tickets.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        ))
+        .values(status="processing")
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False),
+        update(Tickets)
+        .where(Tickets.office_id == office_id, Tickets.worker_id == 0, Tickets.status == 'processing')
+        .values(status="finished")
+        .returning(*Tickets.__table__.columns)
+        .execution_options(synchronize_session=False),
+        # fast path reads
+        select(*ticket_columns).where(Tickets.id == 0),
+        select(*ticket_columns).where(Tickets.email == ""),
+        select(*ticket_columns).where(Tickets.worker_id == 0),
+        select(*ticket_columns).where(Tickets.worker_id == 0, Tickets.status == 'waiting'),
+        workers_queue,
+        workers_queue.where(User.office_id == office_id),
+        # get_ticket_queue
+        select(Tickets).where(Tickets.id == 0),
+        select(Tickets).where(Tickets.office_id == office_id, Tickets.worker_id == 0, Tickets.status == 'waiting').order_by(Tickets.id),
+    ]
+
+
+async def prime_connection(connection, office_id: int):
+    # Run through a session like the routes do, inside a transaction that is
+    # rolled back, so nothing written here is kept.
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection)
+    for stmt in hot_statements(office_id):
+        await session.execute(stmt)
+    await session.close()
+    await transaction.rollback()
+
+
+async def load_queue_state():
+    query = (
+        select(Tickets.office_id, Tickets.worker_id, func.count())
+        .where(Tickets.status == 'waiting')
+        .group_by(Tickets.office_id, Tickets.worker_id)
+    )
+    workers_query = select(User.office_id, User.id).where(User.role == 'worker', User.is_active == True)
+    async with engine.connect() as connection:
+        waiting = (await connection.execute(query)).all()
+        workers = (await connection.execute(workers_query)).all()
+    queue_state.load(
+        [row for row in workers if is_local_office(row[0])],
+        [row for row in waiting if is_local_office(row[0])],
+    )
+
+
+async def warm_up():
+    started = time.perf_counter()
+    connections_count = max(min(DB_POOL_WARMUP, DB_POOL_SIZE + DB_MAX_OVERFLOW), 0)
+
+    # All connections are held open at the same time, otherwise the pool would
+    # hand the same connection back on every checkout.
+    async with AsyncExitStack() as stack:
+        connections = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections_count))
+        )
+        await asyncio.gather(*(
+            prime_connection(connection, -index) for index, connection in enumerate(connections, start=1)
+        ))
+
+    await load_queue_state()
+
+    warmup_state.warmup_seconds = time.perf_counter() - started
+    warmup_state.ready = True
+    print(f"Warm-up finished in {warmup_state.warmup_seconds * 1000:.1f} ms "
+          f"({connections_count} connections, {len(hot_statements(0))} statements, "
+          f"{len(queue_state.offices)} local offices)")